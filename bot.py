@@ -15,236 +15,537 @@ Admin Setup:
 - No manual configuration needed
 """
 
+from __future__ import annotations
+
 import os
+import re
+import asyncio
+import atexit
 import logging
 import sqlite3
-from datetime import datetime
-from typing import Dict, List, Tuple
+import threading
+import queue
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import (
-    Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters
-)
+
+if TYPE_CHECKING:
+    # Only needed for annotations; the handler machinery is imported in main()
+    from telegram.ext import ContextTypes
 
 # Configuration
-# Try to load from .env file first
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv not installed, continue with environment variables
+# Load a .env file first, if there is one
+if os.path.exists(".env"):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv not installed, continue with environment variables
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-if not BOT_TOKEN:
-    raise ValueError("Please set BOT_TOKEN environment variable or create a .env file")
 
 # Admin check will be done dynamically using Telegram's admin system
 
 # Database setup
 DATABASE_NAME = "film_voting.db"
+# Larger than the number of distinct statements below, so every query stays compiled
+SQL_STATEMENT_CACHE_SIZE = 256
+# Read-only connections shared by the query methods (one per concurrent read)
+READ_POOL_SIZE = 4
+
+# SQL statements, kept as module-level constants so each one is parsed once
+# and then served from the connection's statement cache
+# Deleting a film removes its votes through ON DELETE CASCADE
+SQL_CREATE_VOTES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS votes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        film_id INTEGER NOT NULL,
+        round_id INTEGER NOT NULL,
+        seen BOOLEAN NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, round_id),
+        FOREIGN KEY (film_id) REFERENCES films (id) ON DELETE CASCADE,
+        FOREIGN KEY (round_id) REFERENCES rounds (id)
+    );
+'''
+
+SQL_CREATE_SCHEMA = '''
+    BEGIN;
+
+    -- Create films table
+    CREATE TABLE IF NOT EXISTS films (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT UNIQUE NOT NULL
+    );
+
+    -- Create rounds table
+    CREATE TABLE IF NOT EXISTS rounds (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Create votes table with round support
+''' + SQL_CREATE_VOTES_TABLE + '''
+
+    -- Indexes for the per-round vote join (covering seen, so scoring never
+    -- touches the table), the film's votes removed by the delete cascade,
+    -- the active round and case-insensitive title lookups
+    CREATE INDEX IF NOT EXISTS idx_votes_round_film_seen ON votes(round_id, film_id, seen);
+    CREATE INDEX IF NOT EXISTS idx_votes_film ON votes(film_id);
+    CREATE INDEX IF NOT EXISTS idx_rounds_active ON rounds(is_active) WHERE is_active = 1;
+    CREATE INDEX IF NOT EXISTS idx_films_title_nocase ON films(title COLLATE NOCASE);
+
+    -- Create default active round if none exists
+    INSERT INTO rounds (name, is_active)
+    SELECT 'Round 1', 1
+    WHERE NOT EXISTS (SELECT 1 FROM rounds WHERE is_active = 1);
 
-# Configure logging
+    COMMIT;
+'''
+
+# Databases created before ON DELETE CASCADE get their votes table rebuilt;
+# the indexes are recreated by SQL_CREATE_SCHEMA afterwards
+SQL_REBUILD_VOTES_TABLE = '''
+    BEGIN;
+    ALTER TABLE votes RENAME TO votes_old;
+''' + SQL_CREATE_VOTES_TABLE + '''
+    INSERT INTO votes (id, user_id, film_id, round_id, seen, created_at)
+    SELECT id, user_id, film_id, round_id, seen, created_at FROM votes_old;
+    DROP TABLE votes_old;
+    COMMIT;
+'''
+SQL_GET_VOTES_FOREIGN_KEYS = "PRAGMA foreign_key_list(votes)"
+
+# A duplicate title returns no row instead of raising IntegrityError
+SQL_INSERT_FILM = "INSERT INTO films (title) VALUES (?) ON CONFLICT (title) DO NOTHING RETURNING id"
+SQL_INSERT_FILM_IF_NEW = "INSERT OR IGNORE INTO films (title) VALUES (?)"
+SQL_GET_ALL_FILMS = "SELECT id, title FROM films ORDER BY title"
+SQL_GET_FILM_TITLE = "SELECT title FROM films WHERE id = ?"
+SQL_GET_FILM_ID_BY_TITLE = "SELECT id FROM films WHERE title = ? COLLATE NOCASE"
+SQL_DELETE_FILM = "DELETE FROM films WHERE id = ? RETURNING title"
+
+SQL_GET_ACTIVE_ROUND = "SELECT id, name FROM rounds WHERE is_active = 1"
+SQL_GET_ROUND = "SELECT id, name FROM rounds WHERE id = ?"
+SQL_DEACTIVATE_ROUNDS = "UPDATE rounds SET is_active = 0 WHERE is_active = 1"
+SQL_INSERT_ROUND = "INSERT INTO rounds (name, is_active) VALUES (?, 1) RETURNING id, name"
+
+# Resolves the active round inside the INSERT itself; a second vote in the
+# same round is skipped by UNIQUE(user_id, round_id) instead of raising
+SQL_INSERT_VOTE = '''
+    INSERT INTO votes (user_id, film_id, round_id, seen)
+    SELECT ?, ?, id, ? FROM rounds WHERE is_active = 1 LIMIT 1
+    ON CONFLICT (user_id, round_id) DO NOTHING
+    RETURNING round_id
+'''
+SQL_HAS_USER_VOTED = '''
+    SELECT 1 FROM votes
+    WHERE user_id = ? AND round_id = COALESCE(?, (SELECT id FROM rounds WHERE is_active = 1))
+    LIMIT 1
+'''
+SQL_COUNT_FILM_VOTES = "SELECT COALESCE(SUM(seen), 0), COUNT(*) FROM votes WHERE film_id = ? AND round_id = ?"
+# Per-film scores of one round, read from its slice of the covering
+# (round_id, film_id, seen) index. seen is 0/1, so 2 - seen counts half-points
+# (Seen = 1, Unseen = 2) in integer arithmetic, halved once per film into the
+# same 0.5 / 1.0 points add_vote adds in memory
+SQL_GET_ROUND_SCORES = '''
+    SELECT film_id, SUM(2 - seen) / 2.0
+    FROM votes
+    WHERE round_id = ?
+    GROUP BY film_id
+'''
+# Points a single vote adds to its film, keyed by seen
+VOTE_POINTS = {True: 0.5, False: 1.0}
+# add_votes result for a vote that hit a database error, either on its own (e.g. its
+# film was deleted) or because the batch's commit failed, as opposed to None for a
+# repeat vote; round ids start at 1, so 0 is never a round
+VOTE_FAILED = 0
+# Result slot of a queued vote that no transaction has inserted yet
+_VOTE_PENDING = object()
+
+# Message building blocks
+SEPARATOR = "━━━━━━━━━━━━━━━━━━━━\n"
+TROPHIES = ("🥇", "🥈", "🥉")
+SEEN_LABEL = "Seen ✅"
+UNSEEN_LABEL = "Unseen ❌"
+SELECTED_MARK = "👉 "
+
+# Callback data for the Seen/Unseen buttons: mark_<film_id>_<1|0>
+MARK_CALLBACK_RE = re.compile(r"mark_(\d+)_([01])")
+# Mark clicks within this many seconds are coalesced into one keyboard edit
+MARK_REDRAW_DELAY = 0.25
+
+# Configure logging; set LOG_LEVEL=WARNING in production to skip the INFO messages.
+# An unknown name falls back to INFO instead of making the import fail
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+_log_level = getattr(logging, LOG_LEVEL, None)
+if not isinstance(_log_level, int):
+    _log_level = None
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+    level=_log_level if _log_level is not None else logging.INFO
 )
 logger = logging.getLogger(__name__)
+if _log_level is None:
+    logger.warning("Unknown LOG_LEVEL '%s', using INFO", LOG_LEVEL)
 
 
 class FilmVotingBot:
-    def __init__(self):
-        self.db_name = DATABASE_NAME
+    def __init__(self, db_name: str = DATABASE_NAME):
+        self.db_name = db_name
+        # One long-lived connection shared by all methods, serialized by a lock
+        self.conn = sqlite3.connect(
+            self.db_name, check_same_thread=False, cached_statements=SQL_STATEMENT_CACHE_SIZE
+        )
+        self._lock = threading.Lock()
+        # Votes waiting for the next group commit, as [params, result] pairs
+        self._pending_votes: List[list] = []
+        self._pending_lock = threading.Lock()
+        # Pool of read-only connections (opened once the schema exists); with WAL their
+        # queries run alongside the writer and each other instead of queueing behind votes
+        self._read_conns: List[sqlite3.Connection] = []
+        self._readers: queue.Queue = queue.Queue()
+        # In-memory caches; films change only on add/delete, rounds only on /newround
+        self._films_cache: Tuple[Tuple[int, str], ...] = None
+        self._film_by_id: Dict[int, str] = {}
+        self._films_version = 0  # Bumped whenever the film list changes
+        self._active_round: Tuple[int, str] = None
+        # Film scores of the last round asked for, kept current by add_vote instead of re-aggregated
+        self._scores: Dict[int, float] = {}
+        self._scores_round: int = None
         self.init_database()
+        self._open_read_connections()
+        self._warm_up()
+    
+    def _apply_pragmas(self):
+        """Tune the connection: WAL journal, relaxed fsync, mmap, a larger page cache and lock waits."""
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            self.conn.execute("PRAGMA mmap_size=268435456")
+            self.conn.execute("PRAGMA cache_size=-64000")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA foreign_keys=ON")
     
     def init_database(self):
         """Initialize the SQLite database with required tables."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Create films table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS films (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT UNIQUE NOT NULL
-            )
-        ''')
-        
-        # Create rounds table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rounds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create votes table with round support
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS votes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                film_id INTEGER NOT NULL,
-                round_id INTEGER NOT NULL,
-                seen BOOLEAN NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, round_id),
-                FOREIGN KEY (film_id) REFERENCES films (id),
-                FOREIGN KEY (round_id) REFERENCES rounds (id)
-            )
-        ''')
+        self._apply_pragmas()
+        self._migrate_votes_cascade()
+        
+        # All DDL and the default round go through a single transaction (one commit)
+        with self._lock, self.conn:
+            self.conn.executescript(SQL_CREATE_SCHEMA)
         
-        # Create default active round if none exists
-        cursor.execute('SELECT COUNT(*) FROM rounds WHERE is_active = 1')
-        if cursor.fetchone()[0] == 0:
-            cursor.execute('INSERT INTO rounds (name, is_active) VALUES (?, ?)', ('Round 1', 1))
+        # Refresh planner statistics; a no-op when nothing has changed
+        with self._lock:
+            self.conn.execute("PRAGMA optimize")
         
-        conn.commit()
-        conn.close()
         logger.info("Database initialized successfully")
     
-    def add_film(self, title: str) -> bool:
-        """Add a film to the database."""
+    def _open_read_connections(self):
+        """Open the pool of read-only connections used by every query that doesn't write."""
+        # Nothing else can open a private in-memory database; reads then share the writer
+        if self.db_name == ":memory:":
+            return
+        
+        # mode=ro needs a URI; as_uri() takes care of escaping the path
+        uri = Path(self.db_name).absolute().as_uri() + "?mode=ro"
+        for _ in range(READ_POOL_SIZE):
+            conn = sqlite3.connect(
+                uri, uri=True, check_same_thread=False, cached_statements=SQL_STATEMENT_CACHE_SIZE
+            )
+            # journal_mode is stored in the file, so only the per-connection settings are repeated
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-64000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._read_conns.append(conn)
+            self._readers.put(conn)
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a read-only connection from the pool, waiting if all are in use."""
+        if not self._read_conns:
+            # In-memory database: read through the writer connection under its lock
+            with self._lock:
+                yield self.conn
+            return
+        
+        conn = self._readers.get()
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO films (title) VALUES (?)", (title,))
-            conn.commit()
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    def _warm_up(self):
+        """Run the hot queries once so the first commands don't pay for cold caches."""
+        # Prepares each statement on every pooled connection and pulls their pages into memory
+        for conn in self._read_conns:
+            conn.execute(SQL_GET_ACTIVE_ROUND).fetchall()
+            conn.execute(SQL_GET_ALL_FILMS).fetchall()
+            conn.execute(SQL_HAS_USER_VOTED, (0, None)).fetchall()
+        
+        # Fill the in-memory film, round and score caches
+        self.get_all_films()
+        self.get_active_round_info()
+        self.get_results()
+    
+    def _migrate_votes_cascade(self):
+        """Rebuild a votes table whose film foreign key lacks ON DELETE CASCADE."""
+        with self._lock:
+            foreign_keys = self.conn.execute(SQL_GET_VOTES_FOREIGN_KEYS).fetchall()
+            # Columns: id, seq, table, from, to, on_update, on_delete, match
+            if not any(fk[2] == 'films' and fk[6] != 'CASCADE' for fk in foreign_keys):
+                return  # Fresh database or already migrated
+            
+            # Foreign keys must be off while the table is swapped out
+            self.conn.execute("PRAGMA foreign_keys=OFF")
+            try:
+                with self.conn:
+                    self.conn.executescript(SQL_REBUILD_VOTES_TABLE)
+            finally:
+                self.conn.execute("PRAGMA foreign_keys=ON")
+        logger.info("Migrated votes table to ON DELETE CASCADE")
+    
+    def close(self):
+        """Refresh planner statistics and close the database connections."""
+        for conn in self._read_conns:
             conn.close()
-            return True
-        except sqlite3.IntegrityError:
-            logger.warning(f"Film '{title}' already exists")
-            return False
+        with self._lock:
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.ProgrammingError:
+                return  # Already closed
+            self.conn.close()
+    
+    def add_film(self, title: str) -> Optional[int]:
+        """Add a film to the database and return its new ID (None on failure)."""
+        try:
+            with self._lock, self.conn:
+                row = self.conn.execute(SQL_INSERT_FILM, (title,)).fetchone()
+                if row is None:
+                    logger.warning("Film '%s' already exists", title)
+                    return None
+                film_id = row[0]
+                self._invalidate_films()
+                self._film_by_id[film_id] = title
+            return film_id
         except Exception as e:
-            logger.error(f"Error adding film: {e}")
-            return False
+            logger.error("Error adding film: %s", e)
+            return None
+    
+    def add_films(self, titles: Iterable[str]) -> int:
+        """Add several films in one transaction, skipping existing titles; returns how many were added."""
+        try:
+            with self._lock, self.conn:
+                cursor = self.conn.executemany(SQL_INSERT_FILM_IF_NEW, ((title,) for title in titles))
+                if cursor.rowcount > 0:
+                    self._invalidate_films()
+            return cursor.rowcount
+        except Exception as e:
+            logger.error("Error adding films: %s", e)
+            return 0
+    
+    def _invalidate_films(self):
+        """Drop the cached film list after a change; call with the lock held."""
+        self._films_cache = None
+        self._films_version += 1
     
-    def get_all_films(self) -> List[Tuple[int, str]]:
-        """Get all films from the database."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title FROM films ORDER BY title")
-        films = cursor.fetchall()
-        conn.close()
+    @property
+    def films_version(self) -> int:
+        """Counter that changes whenever a film is added or deleted."""
+        return self._films_version
+    
+    def get_all_films(self) -> Tuple[Tuple[int, str], ...]:
+        """Get all films from the database (cached until films are added or deleted)."""
+        with self._lock:
+            if self._films_cache is not None:
+                return self._films_cache
+            version = self._films_version
+        
+        with self._reader() as conn:
+            # A tuple, so callers can't mutate the shared cache
+            films = tuple(conn.execute(SQL_GET_ALL_FILMS).fetchall())
+        
+        # Only cache the list if no film was added or deleted while it was being read
+        with self._lock:
+            if self._films_version == version:
+                self._films_cache = films
+                self._film_by_id = dict(films)
         return films
     
     def get_film_by_id(self, film_id: int) -> str:
         """Get film title by ID."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT title FROM films WHERE id = ?", (film_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        with self._lock:
+            title = self._film_by_id.get(film_id)
+            if title is not None:
+                return title
+            version = self._films_version
+        
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_GET_FILM_TITLE, (film_id,))
+            result = cursor.fetchone()
+        if not result:
+            return None
+        
+        with self._lock:
+            if self._films_version == version:
+                self._film_by_id[film_id] = result[0]
+        return result[0]
     
     def get_active_round(self) -> int:
         """Get the currently active round ID."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM rounds WHERE is_active = 1")
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        return self.get_active_round_info()[0]
     
-    def has_user_voted_in_round(self, user_id: int, round_id: int) -> bool:
-        """Check if user has already voted in the current round."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE user_id = ? AND round_id = ?",
-            (user_id, round_id)
-        )
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count > 0
+    def get_active_round_info(self) -> Tuple[int, str]:
+        """Get the ID and name of the currently active round (cached until /newround)."""
+        with self._lock:
+            if self._active_round:
+                return self._active_round
+        
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_GET_ACTIVE_ROUND)
+            result = cursor.fetchone()
+        
+        # A /newround that committed meanwhile has already set the newer round; keep it
+        with self._lock:
+            if self._active_round is None:
+                self._active_round = result
+            return self._active_round if self._active_round else (None, None)
+    
+    def get_active_round_status(self, user_id: int) -> Tuple[int, str, bool]:
+        """Get the active round ID and name, and whether the user has voted in it."""
+        round_id, round_name = self.get_active_round_info()
+        if round_id is None:
+            return None, None, False
+        return round_id, round_name, self.has_user_voted_in_round(user_id, round_id)
+    
+    def has_user_voted_in_round(self, user_id: int, round_id: int = None) -> bool:
+        """Check if user has already voted in a round (the active one by default)."""
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_HAS_USER_VOTED, (user_id, round_id))
+            return cursor.fetchone() is not None
+    
+    def add_vote(self, user_id: int, film_id: int, seen: bool) -> Optional[int]:
+        """Add a vote for a film in the current round; returns the round it went into, None or VOTE_FAILED."""
+        return self.add_votes([(user_id, film_id, seen)])[0]
+    
+    def add_votes(self, votes: Iterable[Tuple[int, int, bool]]) -> List[Optional[int]]:
+        """Add (user_id, film_id, seen) votes in one transaction; returns the round each went into.
+        
+        A vote skipped as a repeat (or for lack of an active round) gets None, one that
+        failed with a database error gets VOTE_FAILED.
+        """
+        # Group commit: queue the votes, then whichever caller gets the writer lock first
+        # inserts everything queued so far in one transaction
+        batch = [[vote, _VOTE_PENDING] for vote in votes]
+        with self._pending_lock:
+            self._pending_votes.extend(batch)
+        
+        with self._lock:
+            # The queue is drained whole, so either all of the batch is done or none of it
+            if batch and batch[0][1] is _VOTE_PENDING:
+                self._commit_pending_votes()
+        return [vote[1] for vote in batch]
     
-    def add_vote(self, user_id: int, film_id: int, seen: bool) -> bool:
-        """Add a vote for a film in the current round."""
+    def _commit_pending_votes(self):
+        """Insert all queued votes in one transaction and fill in their results; call with the lock held."""
+        with self._pending_lock:
+            batch, self._pending_votes = self._pending_votes, []
+        
+        scored = []  # (film_id, seen) of recorded votes in the round whose scores are cached
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Get active round
-            round_id = self.get_active_round()
-            if not round_id:
-                logger.error("No active round found")
-                return False
-            
-            cursor.execute(
-                "INSERT INTO votes (user_id, film_id, round_id, seen) VALUES (?, ?, ?, ?)",
-                (user_id, film_id, round_id, seen)
-            )
-            conn.commit()
-            conn.close()
-            return True
-        except sqlite3.IntegrityError:
-            logger.warning(f"User {user_id} has already voted in round {round_id}")
-            return False
+            with self.conn:
+                for vote in batch:
+                    try:
+                        inserted = self.conn.execute(SQL_INSERT_VOTE, vote[0]).fetchone()
+                    except sqlite3.Error as e:
+                        # Only this vote fails (e.g. its film was just deleted); the batch goes on
+                        logger.error("Error adding vote: %s", e)
+                        vote[1] = VOTE_FAILED
+                        continue
+                    vote[1] = inserted[0] if inserted else None
+                    if vote[1] is None:
+                        logger.warning("Vote from user %s not recorded: already voted or no active round", vote[0][0])
+                    elif inserted[0] == self._scores_round:
+                        scored.append(vote[0][1:])
         except Exception as e:
-            logger.error(f"Error adding vote: {e}")
-            return False
-    
-    def get_results(self, round_id: int = None) -> List[Tuple[str, float]]:
-        """Get all films with their scores for a specific round, sorted by highest first."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+            # The commit itself failed, so none of the batch was stored
+            logger.error("Error adding votes: %s", e)
+            for vote in batch:
+                vote[1] = VOTE_FAILED
+            return
         
+        # Committed; bring the cached scores up to date
+        for film_id, seen in scored:
+            self._scores[film_id] = self._scores.get(film_id, 0.0) + VOTE_POINTS[bool(seen)]
+    
+    def _get_film_scores(self, round_id: int = None) -> List[Tuple[int, str, float]]:
+        """Get (film_id, title, score) for every film in a round (the active one by default), unsorted."""
         if round_id is None:
             round_id = self.get_active_round()
+        films = self.get_all_films()
         
-        cursor.execute('''
-            SELECT f.title, 
-                   COALESCE(SUM(
-                       CASE 
-                           WHEN v.seen = 1 THEN 0.5
-                           WHEN v.seen = 0 THEN 1.0
-                           ELSE 0
-                       END
-                   ), 0) as total_score
-            FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id AND v.round_id = ?
-            GROUP BY f.id, f.title
-            ORDER BY total_score DESC
-        ''', (round_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        with self._lock:
+            if self._scores_round != round_id:
+                # Aggregate the round once; add_vote keeps the scores current from then on.
+                # Loaded under the writer lock so no vote can commit in between
+                self._scores = dict(self.conn.execute(SQL_GET_ROUND_SCORES, (round_id,)).fetchall())
+                self._scores_round = round_id
+            return [(film_id, title, self._scores.get(film_id, 0.0)) for film_id, title in films]
+    
+    @staticmethod
+    def _rank_key(film_score: Tuple[int, str, float]) -> Tuple[float, int]:
+        """Sort key for highest score first, ties in the order the films were added."""
+        return -film_score[2], film_score[0]
+    
+    def get_results(self, round_id: int = None) -> List[Tuple[str, float]]:
+        """Get all films with their scores for a specific round, sorted by highest first."""
+        film_scores = sorted(self._get_film_scores(round_id), key=self._rank_key)
+        return [(title, score) for film_id, title, score in film_scores]
     
     def get_winner(self, round_id: int = None) -> Tuple[str, float]:
         """Get the top-scoring film for a specific round."""
-        results = self.get_results(round_id)
-        return results[0] if results else (None, 0.0)
+        film_scores = self._get_film_scores(round_id)
+        if not film_scores:
+            return None, 0.0
+        film_id, title, score = min(film_scores, key=self._rank_key)
+        return title, score
     
     def create_new_round(self, name: str) -> bool:
         """Create a new round and deactivate the current one."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Deactivate current active round
-            cursor.execute("UPDATE rounds SET is_active = 0 WHERE is_active = 1")
-            
-            # Create new round
-            cursor.execute("INSERT INTO rounds (name, is_active) VALUES (?, 1)", (name,))
-            
-            conn.commit()
-            conn.close()
+            with self._lock:
+                with self.conn:
+                    # Take the write lock up front; both writes commit together
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    
+                    # Deactivate current active round
+                    self.conn.execute(SQL_DEACTIVATE_ROUNDS)
+                    
+                    # Create new round; RETURNING hands back the (id, name) cache entry
+                    new_round = self.conn.execute(SQL_INSERT_ROUND, (name,)).fetchone()
+                
+                # Committed; the new round is now the active one
+                self._active_round = new_round
             return True
         except Exception as e:
-            logger.error(f"Error creating new round: {e}")
+            logger.error("Error creating new round: %s", e)
             return False
     
     def get_round_info(self, round_id: int = None) -> Tuple[int, str]:
         """Get round information."""
         if round_id is None:
-            round_id = self.get_active_round()
+            return self.get_active_round_info()
         
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM rounds WHERE id = ?", (round_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_GET_ROUND, (round_id,))
+            result = cursor.fetchone()
         return result if result else (None, None)
     
     def get_vote_counts_for_film(self, film_id: int, round_id: int = None) -> Dict[str, int]:
@@ -252,73 +553,51 @@ class FilmVotingBot:
         if round_id is None:
             round_id = self.get_active_round()
         
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Get seen votes
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE film_id = ? AND round_id = ? AND seen = 1",
-            (film_id, round_id)
-        )
-        seen_count = cursor.fetchone()[0]
-        
-        # Get unseen votes
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE film_id = ? AND round_id = ? AND seen = 0",
-            (film_id, round_id)
-        )
-        unseen_count = cursor.fetchone()[0]
-        
-        conn.close()
+        # seen is 0/1, so its sum is the number of Seen votes
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_COUNT_FILM_VOTES, (film_id, round_id))
+            seen_count, total_count = cursor.fetchone()
         
         return {
             'seen': seen_count,
-            'unseen': unseen_count,
-            'total': seen_count + unseen_count
+            'unseen': total_count - seen_count,
+            'total': total_count
         }
     
     def delete_film(self, film_id: int) -> bool:
         """Delete a film and all its associated votes."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # First, get the film title for logging
-            cursor.execute("SELECT title FROM films WHERE id = ?", (film_id,))
-            result = cursor.fetchone()
-            if not result:
-                conn.close()
-                return False
-            
-            film_title = result[0]
+            with self._lock, self.conn:
+                # Votes go with the film via ON DELETE CASCADE; the title is returned for logging
+                result = self.conn.execute(SQL_DELETE_FILM, (film_id,)).fetchone()
+                if not result:
+                    return False
+                
+                film_title = result[0]
+                self._invalidate_films()
+                self._film_by_id.pop(film_id, None)
+                # Its votes went with it
+                self._scores.pop(film_id, None)
             
-            # Delete all votes for this film
-            cursor.execute("DELETE FROM votes WHERE film_id = ?", (film_id,))
-            
-            # Delete the film
-            cursor.execute("DELETE FROM films WHERE id = ?", (film_id,))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Film '{film_title}' (ID: {film_id}) deleted successfully")
+            logger.info("Film '%s' (ID: %s) deleted successfully", film_title, film_id)
             return True
         except Exception as e:
-            logger.error(f"Error deleting film {film_id}: {e}")
+            logger.error("Error deleting film %s: %s", film_id, e)
             return False
     
     def get_film_id_by_title(self, title: str) -> int:
         """Get film ID by title (case-insensitive)."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM films WHERE LOWER(title) = LOWER(?)", (title,))
-        result = cursor.fetchone()
-        conn.close()
+        with self._reader() as conn:
+            cursor = conn.execute(SQL_GET_FILM_ID_BY_TITLE, (title,))
+            result = cursor.fetchone()
         return result[0] if result else None
 
 
-# Global bot instance
-bot = FilmVotingBot()
+# Global bot instance, created in main() so importing this module has no side effects
+bot: FilmVotingBot = None
+
+# Rendered /vote interface for the current (round_id, films_version); see vote()
+_voting_interface_cache: Dict[Tuple[int, int], tuple] = {}
 
 
 async def is_user_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
@@ -329,7 +608,7 @@ async def is_user_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> b
         member = await context.bot.get_chat_member(chat_id, user_id)
         return member.status in ('administrator', 'creator')
     except Exception as e:
-        logger.warning(f"Error checking admin status: {e}")
+        logger.warning("Error checking admin status: %s", e)
         return False
 
 
@@ -348,6 +627,7 @@ When you type /vote in the group chat, I'll send you a private message with the
 
 **⚙️ Admin Commands:**
 • `/addfilm <title>` - Add a new film
+• `/importfilms` - Add several films, one title per line
 • `/deletefilm <title>` - Delete a film from the database
 • `/newround <name>` - Create a new voting round
     """
@@ -367,26 +647,35 @@ async def add_film(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     film_title = " ".join(context.args)
     
-    if bot.add_film(film_title):
+    if await asyncio.to_thread(bot.add_film, film_title):
         await update.message.reply_text(f"✅ Film '{film_title}' added successfully!")
     else:
         await update.message.reply_text(f"❌ Film '{film_title}' already exists or could not be added.")
 
 
-async def vote(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Send voting interface directly to DM without group notification."""
-    films = bot.get_all_films()
+async def import_films(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Add several films at once, one title per line (Admin only)."""
+    if not await is_user_admin(update, context):
+        await update.message.reply_text("❌ Sorry, only admins can add films.")
+        return
     
-    if not films:
-        await update.message.reply_text("📝 No films available. Ask an admin to add some films!")
+    # Everything after the command itself, one title per line
+    parts = update.message.text.split(None, 1)
+    titles = [line.strip() for line in parts[1].splitlines() if line.strip()] if len(parts) > 1 else []
+    
+    if not titles:
+        await update.message.reply_text("❌ Please provide film titles, one per line:\n/importfilms\n<film name>\n<film name>")
         return
     
-    # Get current round info
-    round_id, round_name = bot.get_round_info()
+    added = await asyncio.to_thread(bot.add_films, titles)
+    await update.message.reply_text(f"✅ Imported {added} of {len(titles)} films (existing titles are skipped).")
+
+
+async def vote(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Send voting interface directly to DM without group notification."""
+    # Get current round info and whether the user has already voted in it
     user_id = update.effective_user.id
-    
-    # Check if user has already voted in this round
-    has_voted_in_round = bot.has_user_voted_in_round(user_id, round_id)
+    round_id, round_name, has_voted_in_round = await asyncio.to_thread(bot.get_active_round_status, user_id)
     
     if has_voted_in_round:
         # User already voted in this round
@@ -396,32 +685,24 @@ async def vote(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
         return
     
-    # Create voting interface
-    poll_message = f"🎬 **{round_name} - Movie Voting** 🎬\n\n"
-    poll_message += "Mark each movie as Seen or Unseen, then vote for ONE movie:\n\n"
-    
-    keyboard = []
-    for i, (film_id, title) in enumerate(films, 1):
-        # Add movie option with number
-        poll_message += f"**{i}.** 🎭 {title}\n"
+    # The interface only depends on the round and the film list, so it is built once per
+    # pair; read the version before the films so a concurrent change can't be cached as current
+    cache_key = (round_id, bot.films_version)
+    interface = _voting_interface_cache.get(cache_key)
+    if interface is None:
+        films = await asyncio.to_thread(bot.get_all_films)
         
-        # Add Seen/Unseen buttons for this movie
-        keyboard.append([
-            InlineKeyboardButton(f"Seen ✅", callback_data=f"mark_{film_id}_1"),
-            InlineKeyboardButton(f"Unseen ❌", callback_data=f"mark_{film_id}_0")
-        ])
+        if not films:
+            await update.message.reply_text("📝 No films available. Ask an admin to add some films!")
+            return
         
-        # Add separator between movies (except for last one)
-        if i < len(films):
-            poll_message += "━━━━━━━━━━━━━━━━━━━━\n"
-    
-    # Add vote button at the bottom
-    keyboard.append([
-        InlineKeyboardButton("Vote for this movie 🎯", callback_data="submit_vote")
-    ])
-    
-    poll_message += "\n💡 *Mark each movie's status, then click 'Vote for this movie'*"
+        interface = build_voting_interface(round_name, films)
+        _voting_interface_cache.clear()
+        _voting_interface_cache[cache_key] = interface
     
+    poll_message, keyboard, keyboard_rows, film_titles = interface
+    # Each session gets its own row list, since mark clicks swap rows in it
+    keyboard = list(keyboard)
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     # Send voting interface to user's DM
@@ -439,13 +720,21 @@ async def vote(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         
         context.bot_data['voting_sessions'][user_id] = {
             'round_id': round_id,
+            'round_name': round_name,
+            'film_titles': film_titles,
+            'keyboard': keyboard,
+            'keyboard_rows': keyboard_rows,
             'marks': {},
+            'shown_marks': {},
+            'redraw_lock': asyncio.Lock(),
+            'redraw_pending': False,
+            'submitting': False,
             'message_id': None,
             'vote_chat_id': update.effective_chat.id
         }
         
     except Exception as e:
-        logger.warning(f"Could not send DM to user {user_id}: {e}")
+        logger.warning("Could not send DM to user %s: %s", user_id, e)
         # Fallback to group chat if DM fails
         await update.message.reply_text(
             poll_message,
@@ -462,11 +751,10 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     data = query.data
     user_id = update.effective_user.id
     
-    if data.startswith("mark_"):
+    if mark := MARK_CALLBACK_RE.fullmatch(data):
         # Handle marking movies as Seen/Unseen
-        parts = data.split("_")
-        film_id = int(parts[1])
-        seen = bool(int(parts[2]))
+        film_id = int(mark[1])
+        seen = mark[2] == "1"
         
         # Get or create voting session
         if 'voting_sessions' not in context.bot_data:
@@ -477,10 +765,39 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             return
         
         session = context.bot_data['voting_sessions'][user_id]
+        
+        # A button from an older /vote message can name a film this session doesn't have
+        # (e.g. deleted since); ignore it rather than record a mark for it
+        row = session['keyboard_rows'].get(film_id)
+        if row is None:
+            return
+        
+        # Re-clicking the current mark changes nothing, so skip the edit
+        if session['marks'].get(film_id) == seen:
+            return
+        
         session['marks'][film_id] = seen
+        session['keyboard'][row] = build_mark_buttons(film_id, seen)
+        
+        # A redraw is already scheduled and will pick up this mark too
+        if session['redraw_pending']:
+            return
         
-        # Update the voting interface to show current marks
-        await update_voting_interface(query, context, user_id, session)
+        session['redraw_pending'] = True
+        await asyncio.sleep(MARK_REDRAW_DELAY)
+        async with session['redraw_lock']:
+            session['redraw_pending'] = False
+            # Skip if the vote was submitted meanwhile, or the marks ended up where they were
+            if session['submitting'] or context.bot_data['voting_sessions'].get(user_id) is not session:
+                return
+            if session['marks'] == session['shown_marks']:
+                return
+            
+            # Only the buttons show the marks, so the message text is left alone. The marks
+            # count as shown only once the edit went through, so a failed one is retried
+            marks = dict(session['marks'])
+            await update_voting_interface(query, context, user_id, session)
+            session['shown_marks'] = marks
     
     elif data == "submit_vote":
         # Handle submitting the vote
@@ -494,163 +811,194 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await query.answer("❌ Please mark at least one movie before voting!")
             return
         
-        # Check if user has already voted in this round
-        if bot.has_user_voted_in_round(user_id, session['round_id']):
-            await query.edit_message_text(
-                f"❌ **Already Voted!** ❌\n\n"
-                f"You have already voted in this round.\n\n"
-                f"Use /results to see current standings."
-            )
-            # Clean up the voting session
-            if user_id in context.bot_data['voting_sessions']:
-                del context.bot_data['voting_sessions'][user_id]
+        # Updates are handled concurrently, so claim the session before the first await;
+        # a double-tapped submit then leaves the vote and the message to the first tap
+        if session['submitting']:
             return
+        session['submitting'] = True
         
-        # Get the first marked movie (user can only vote for one)
-        film_id = list(session['marks'].keys())[0]
-        seen = session['marks'][film_id]
-        
-        if bot.add_vote(user_id, film_id, seen):
-            film_title = bot.get_film_by_id(film_id)
-            round_id, round_name = bot.get_round_info()
-            status = "Seen" if seen else "Unseen"
+        try:
+            # Get the first marked movie (user can only vote for one)
+            film_id = list(session['marks'].keys())[0]
+            seen = session['marks'][film_id]
             
-            # Get user's name for group notification
-            user_name = update.effective_user.first_name
-            if update.effective_user.last_name:
-                user_name += f" {update.effective_user.last_name}"
+            # add_vote rejects a second vote in the round via UNIQUE(user_id, round_id),
+            # so no separate has-voted check is needed first
+            vote_round_id = await asyncio.to_thread(bot.add_vote, user_id, film_id, seen)
+            if vote_round_id:
+                # Titles were captured with the session; only hit the database on a miss
+                film_title = session['film_titles'].get(film_id)
+                if film_title is None:
+                    film_title = await asyncio.to_thread(bot.get_film_by_id, film_id)
+                # The vote goes into the round active at submit time, which a /newround
+                # since /vote may have changed
+                if vote_round_id == session['round_id']:
+                    round_name = session['round_name']
+                else:
+                    round_name = (await asyncio.to_thread(bot.get_round_info, vote_round_id))[1]
+                status = "Seen" if seen else "Unseen"
             
-            # Send confirmation to DM
-            confirmation_message = f"✅ **Vote Confirmation - {round_name}** ✅\n\n"
-            confirmation_message += f"🎬 **Movie:** {film_title}\n"
-            confirmation_message += f"👁️ **Your Vote:** {status}\n\n"
-            confirmation_message += "🎉 *Your vote has been recorded successfully!*"
+                # Get user's name for group notification
+                user_name = update.effective_user.first_name
+                if update.effective_user.last_name:
+                    user_name += f" {update.effective_user.last_name}"
             
-            try:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=confirmation_message,
-                    parse_mode='Markdown'
+                # Send confirmation to DM
+                confirmation_message = (
+                    f"✅ **Vote Confirmation - {round_name}** ✅\n\n"
+                    f"🎬 **Movie:** {film_title}\n"
+                    f"👁️ **Your Vote:** {status}\n\n"
+                    "🎉 *Your vote has been recorded successfully!*"
                 )
-            except Exception as e:
-                logger.warning(f"Could not send confirmation DM to user {user_id}: {e}")
             
-            # Update the voting interface to show completion
-            await query.edit_message_text(
-                f"✅ **Vote Submitted!** ✅\n\n"
-                f"🎬 You voted for: **{film_title}**\n"
-                f"👁️ Status: **{status}**\n\n"
-                f"Check your private messages for confirmation."
-            )
+                api_calls = [
+                    context.bot.send_message(
+                        chat_id=user_id,
+                        text=confirmation_message,
+                        parse_mode='Markdown'
+                    ),
+                    # Update the voting interface to show completion
+                    query.edit_message_text(
+                        f"✅ **Vote Submitted!** ✅\n\n"
+                        f"🎬 You voted for: **{film_title}**\n"
+                        f"👁️ Status: **{status}**\n\n"
+                        f"Check your private messages for confirmation."
+                    )
+                ]
             
-            # Notify the group (without showing the choice)
-            try:
-                # Get the original chat where /vote was called
-                # We need to store this information when the vote command is called
+                # Notify the group (without showing the choice)
                 if 'vote_chat_id' in session:
-                    await context.bot.send_message(
+                    api_calls.append(context.bot.send_message(
                         chat_id=session['vote_chat_id'],
                         text=f"✅ {user_name} has voted."
-                    )
-            except Exception as e:
-                logger.warning(f"Could not send group notification: {e}")
+                    ))
             
-            # Clean up the voting session
-            del context.bot_data['voting_sessions'][user_id]
+                # Independent Telegram API calls, so send them concurrently
+                dm_result, edit_result, *notify_result = await asyncio.gather(*api_calls, return_exceptions=True)
             
-        else:
-            await query.edit_message_text(
-                f"❌ **Already Voted!** ❌\n\n"
-                f"You have already voted in this round.\n\n"
-                f"Use /results to see current standings."
-            )
+                if isinstance(dm_result, Exception):
+                    logger.warning("Could not send confirmation DM to user %s: %s", user_id, dm_result)
+                    # Show the full confirmation in the voting message instead
+                    try:
+                        await query.edit_message_text(confirmation_message, parse_mode='Markdown')
+                    except Exception as e:
+                        logger.warning("Could not show vote confirmation to user %s: %s", user_id, e)
+                elif isinstance(edit_result, Exception):
+                    logger.warning("Could not update voting interface for user %s: %s", user_id, edit_result)
+            
+                if notify_result and isinstance(notify_result[0], Exception):
+                    logger.warning("Could not send group notification: %s", notify_result[0])
+            
+            elif vote_round_id == VOTE_FAILED:
+                # Not a repeat vote but a database error: the film may have been deleted after
+                # this /vote, or the save failed outright; either way a fresh /vote can retry
+                await query.edit_message_text(
+                    f"❌ **Vote Not Saved** ❌\n\n"
+                    f"Your vote could not be saved.\n\n"
+                    f"Please use /vote again."
+                )
+            
+            else:
+                await query.edit_message_text(
+                    f"❌ **Already Voted!** ❌\n\n"
+                    f"You have already voted in this round.\n\n"
+                    f"Use /results to see current standings."
+                )
+        finally:
+            # Success or not, this session is used up (a failed edit must not leave it
+            # claimed, silently dropping every later tap); /vote starts a new one
+            if context.bot_data['voting_sessions'].get(user_id) is session:
+                context.bot_data['voting_sessions'].pop(user_id)
 
 
-async def update_voting_interface(query, context, user_id, session):
-    """Update the voting interface to show current marks."""
-    films = bot.get_all_films()
-    round_id, round_name = bot.get_round_info()
-    
-    poll_message = f"🎬 **{round_name} - Movie Voting** 🎬\n\n"
-    poll_message += "Mark each movie as Seen or Unseen, then vote for ONE movie:\n\n"
-    
-    keyboard = []
-    for i, (film_id, title) in enumerate(films, 1):
-        # Check if this movie is marked
-        mark_status = ""
-        if film_id in session['marks']:
-            if session['marks'][film_id]:
-                mark_status = " ✅"
-            else:
-                mark_status = " ❌"
-        
-        # Add movie option with number and mark status
-        poll_message += f"**{i}.** 🎭 {title}{mark_status}\n"
-        
-        # Add Seen/Unseen buttons for this movie
-        keyboard.append([
-            InlineKeyboardButton(f"Seen ✅", callback_data=f"mark_{film_id}_1"),
-            InlineKeyboardButton(f"Unseen ❌", callback_data=f"mark_{film_id}_0")
-        ])
-        
-        # Add separator between movies (except for last one)
-        if i < len(films):
-            poll_message += "━━━━━━━━━━━━━━━━━━━━\n"
+def build_voting_interface(
+    round_name: str, films: Tuple[Tuple[int, str], ...]
+) -> Tuple[str, List[List[InlineKeyboardButton]], Dict[int, int], Dict[int, str]]:
+    """Build the poll text, keyboard, keyboard row of each film and film titles for /vote."""
+    # The text never changes, mark clicks only swap keyboard rows
+    # Movie options with numbers
+    film_rows = [f"**{i}.** 🎭 {title}" for i, (film_id, title) in enumerate(films, 1)]
     
-    # Add vote button at the bottom
+    # One row of Seen/Unseen buttons per movie, in film order, then the vote button at the bottom
+    keyboard = [build_mark_buttons(film_id, None) for film_id, title in films]
     keyboard.append([
         InlineKeyboardButton("Vote for this movie 🎯", callback_data="submit_vote")
     ])
+    keyboard_rows = {film_id: row for row, (film_id, title) in enumerate(films)}
     
-    poll_message += "\n💡 *Mark each movie's status, then click 'Vote for this movie'*"
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(
-        text=poll_message,
-        parse_mode='Markdown',
-        reply_markup=reply_markup
+    return build_poll_message(round_name, film_rows), keyboard, keyboard_rows, dict(films)
+
+
+def build_mark_buttons(film_id: int, seen: Optional[bool]) -> List[InlineKeyboardButton]:
+    """Build the Seen/Unseen button row for a film, flagging the current mark."""
+    return [
+        InlineKeyboardButton(
+            f"{SELECTED_MARK if seen is True else ''}{SEEN_LABEL}", callback_data=f"mark_{film_id}_1"
+        ),
+        InlineKeyboardButton(
+            f"{SELECTED_MARK if seen is False else ''}{UNSEEN_LABEL}", callback_data=f"mark_{film_id}_0"
+        )
+    ]
+
+
+def build_poll_message(round_name: str, film_rows: List[str]) -> str:
+    """Render the voting message from pre-built film rows."""
+    # Separator between movies (not after the last one)
+    movies = SEPARATOR.join(f"{row}\n" for row in film_rows)
+    return (
+        f"🎬 **{round_name} - Movie Voting** 🎬\n\n"
+        "Mark each movie as Seen or Unseen, then vote for ONE movie:\n\n"
+        + movies
+        + "\n💡 *Mark each movie's status, then click 'Vote for this movie'*"
     )
 
 
+async def update_voting_interface(query, context, user_id, session):
+    """Update the voting buttons to show current marks."""
+    # The keyboard was captured with the session, so no database reads and no text re-render
+    await query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(session['keyboard']))
+
+
 async def results(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show all films with their scores for the current round."""
-    round_id, round_name = bot.get_round_info()
-    results = bot.get_results(round_id)
+    round_id, round_name = await asyncio.to_thread(bot.get_active_round_info)
+    results = await asyncio.to_thread(bot.get_results, round_id)
     
     if not results:
         await update.message.reply_text("📝 No films available. Ask an admin to add some films!")
         return
     
-    message = f"📊 **{round_name} - Voting Results** 📊\n\n"
+    entries = [
+        f"{TROPHIES[i] if i < len(TROPHIES) else '📊'} **{title}**\n"
+        f"   📈 **{score:.1f} points**\n"
+        for i, (title, score) in enumerate(results)
+    ]
     
-    for i, (title, score) in enumerate(results, 1):
-        trophy = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "📊"
-        message += f"{trophy} **{title}**\n"
-        message += f"   📈 **{score:.1f} points**\n"
-        
-        # Add separator between movies (except for last one)
-        if i < len(results):
-            message += "━━━━━━━━━━━━━━━━━━━━\n"
-    
-    message += f"\n💡 *Scoring: Seen = 0.5 points, Unseen = 1.0 points*"
+    # Separator between movies (not after the last one)
+    message = (
+        f"📊 **{round_name} - Voting Results** 📊\n\n"
+        + SEPARATOR.join(entries)
+        + "\n💡 *Scoring: Seen = 0.5 points, Unseen = 1.0 points*"
+    )
     
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
 async def winner(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show the top-scoring film for the current round."""
-    round_id, round_name = bot.get_round_info()
-    winner_title, winner_score = bot.get_winner(round_id)
+    round_id, round_name = await asyncio.to_thread(bot.get_active_round_info)
+    winner_title, winner_score = await asyncio.to_thread(bot.get_winner, round_id)
     
     if not winner_title:
         await update.message.reply_text("📝 No films available. Ask an admin to add some films!")
         return
     
-    message = f"🏆 **{round_name} - WINNER** 🏆\n\n"
-    message += f"👑 **{winner_title}**\n"
-    message += f"📊 **{winner_score:.1f} points**\n\n"
-    message += f"🎉 *Congratulations to the winning film!*"
+    message = (
+        f"🏆 **{round_name} - WINNER** 🏆\n\n"
+        f"👑 **{winner_title}**\n"
+        f"📊 **{winner_score:.1f} points**\n\n"
+        f"🎉 *Congratulations to the winning film!*"
+    )
     
     await update.message.reply_text(message, parse_mode='Markdown')
 
@@ -667,7 +1015,7 @@ async def new_round(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     round_name = " ".join(context.args)
     
-    if bot.create_new_round(round_name):
+    if await asyncio.to_thread(bot.create_new_round, round_name):
         await update.message.reply_text(f"✅ New round '{round_name}' created successfully!\n\nUsers can now vote again with /vote")
     else:
         await update.message.reply_text(f"❌ Could not create new round '{round_name}'.")
@@ -684,13 +1032,13 @@ async def delete_film(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
     
     film_title = " ".join(context.args)
-    film_id = bot.get_film_id_by_title(film_title)
+    film_id = await asyncio.to_thread(bot.get_film_id_by_title, film_title)
     
     if not film_id:
         await update.message.reply_text(f"❌ Film '{film_title}' not found in the database.")
         return
     
-    if bot.delete_film(film_id):
+    if await asyncio.to_thread(bot.delete_film, film_id):
         await update.message.reply_text(f"✅ Film '{film_title}' deleted successfully!")
     else:
         await update.message.reply_text(f"❌ Could not delete film '{film_title}'.")
@@ -698,29 +1046,39 @@ async def delete_film(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
 async def list_films(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all films in the database."""
-    films = bot.get_all_films()
+    films = await asyncio.to_thread(bot.get_all_films)
     
     if not films:
         await update.message.reply_text("📝 No films available in the database.")
         return
     
-    message = "🎬 **Available Films:**\n\n"
-    for i, (film_id, title) in enumerate(films, 1):
-        message += f"**{i}.** {title}\n"
-    
-    message += f"\n📊 Total: {len(films)} films"
+    film_lines = "".join(f"**{i}.** {title}\n" for i, (film_id, title) in enumerate(films, 1))
+    message = f"🎬 **Available Films:**\n\n{film_lines}\n📊 Total: {len(films)} films"
     
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
 def main() -> None:
     """Start the bot."""
-    # Create the Application
-    application = Application.builder().token(BOT_TOKEN).build()
+    from telegram.ext import Application, CommandHandler, CallbackQueryHandler
+    
+    global bot
+    
+    if not BOT_TOKEN:
+        raise ValueError("Please set BOT_TOKEN environment variable or create a .env file")
+    
+    bot = FilmVotingBot()
+    # Also close the database if the process exits some other way than polling stopping
+    atexit.register(bot.close)
+    
+    # Create the Application; database work runs in worker threads, so let
+    # updates from different users be handled concurrently
+    application = Application.builder().token(BOT_TOKEN).concurrent_updates(True).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("addfilm", add_film))
+    application.add_handler(CommandHandler("importfilms", import_films))
     application.add_handler(CommandHandler("deletefilm", delete_film))
     application.add_handler(CommandHandler("listfilms", list_films))
     application.add_handler(CommandHandler("vote", vote))
@@ -734,6 +1092,9 @@ def main() -> None:
     # Start the bot
     logger.info("Starting Film Voting Bot...")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
+    
+    # Polling has stopped; optimize and close the database
+    bot.close()
 
 
 if __name__ == "__main__":
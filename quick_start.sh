@@ -6,7 +6,7 @@ echo ""
 
 # Check if Python is installed
 if ! command -v python3 &> /dev/null; then
-    echo "❌ Python 3 is not installed. Please install Python 3.7+ first."
+    echo "❌ Python 3 is not installed. Please install Python 3.9+ first."
     exit 1
 fi
 
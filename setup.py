@@ -7,6 +7,9 @@ This script helps you configure the bot with your token and user ID.
 import os
 import re
 
+# Bot tokens look like 123456789:ABCdefGHIjklMNOpqrsTUVwxyz
+TOKEN_RE = re.compile(r'^\d+:[A-Za-z0-9_-]+$')
+
 def get_bot_token():
     """Get bot token from user input."""
     print("🔑 Bot Token Setup")
@@ -18,7 +21,7 @@ def get_bot_token():
     
     while True:
         token = input("Enter your bot token: ").strip()
-        if re.match(r'^\d+:[A-Za-z0-9_-]+$', token):
+        if TOKEN_RE.match(token):
             return token
         else:
             print("❌ Invalid token format. Please try again.")
@@ -5,7 +5,6 @@ This script tests the database functionality without running the Telegram bot.
 """
 
 import sqlite3
-import os
 
 def test_database():
     """Test the database functionality."""
@@ -14,12 +13,10 @@ def test_database():
     
     # Test database creation
     print("1. Testing database creation...")
-    if os.path.exists("film_voting.db"):
-        os.remove("film_voting.db")
     
-    # Import and initialize the bot
+    # Import and initialize the bot on a throwaway in-memory database
     from bot import FilmVotingBot
-    bot = FilmVotingBot()
+    bot = FilmVotingBot(db_name=":memory:")
     print("✅ Database created successfully")
     
     # Test adding films
@@ -32,12 +29,12 @@ def test_database():
         "Inception"
     ]
     
-    for film in test_films:
-        success = bot.add_film(film)
-        if success:
-            print(f"✅ Added: {film}")
-        else:
-            print(f"❌ Failed to add: {film}")
+    # One transaction for the whole list
+    added = bot.add_films(test_films)
+    if added == len(test_films):
+        print(f"✅ Added {added} films")
+    else:
+        print(f"❌ Only added {added} of {len(test_films)} films")
     
     # Test duplicate prevention
     print("\n3. Testing duplicate prevention...")
@@ -51,31 +48,35 @@ def test_database():
     print("\n4. Testing voting system...")
     test_user_id = 12345
     films = bot.get_all_films()
+    titles = dict(films)
     
-    for film_id, title in films[:3]:  # Test first 3 films
-        # Test seen vote
-        success = bot.add_vote(test_user_id, film_id, True)
+    # One vote per user, all recorded in one transaction
+    votes = [(test_user_id + i, film_id, True) for i, (film_id, title) in enumerate(films[:3])]
+    for (user_id, film_id, seen), success in zip(votes, bot.add_votes(votes)):
+        title = titles[film_id]
         if success:
             print(f"✅ Voted 'Seen' for: {title}")
         else:
             print(f"❌ Failed to vote 'Seen' for: {title}")
-        
-        # Test duplicate vote prevention
-        success = bot.add_vote(test_user_id, film_id, False)
-        if not success:
-            print(f"✅ Duplicate vote prevention working for: {title}")
-        else:
-            print(f"❌ Duplicate vote prevention failed for: {title}")
+    
+    # Test duplicate vote prevention
+    film_id, title = films[1]
+    success = bot.add_vote(test_user_id, film_id, False)
+    if not success:
+        print(f"✅ Duplicate vote prevention working for: {title}")
+    else:
+        print(f"❌ Duplicate vote prevention failed for: {title}")
     
     # Test another user voting
     print("\n5. Testing multiple users...")
     test_user_id_2 = 67890
-    for film_id, title in films[3:]:  # Test last 2 films
-        success = bot.add_vote(test_user_id_2, film_id, False)
+    votes = [(test_user_id_2 + i, film_id, False) for i, (film_id, title) in enumerate(films[3:])]
+    for (user_id, film_id, seen), success in zip(votes, bot.add_votes(votes)):
+        title = titles[film_id]
         if success:
-            print(f"✅ User 2 voted 'Not Seen' for: {title}")
+            print(f"✅ User {user_id} voted 'Not Seen' for: {title}")
         else:
-            print(f"❌ User 2 failed to vote for: {title}")
+            print(f"❌ User {user_id} failed to vote for: {title}")
     
     # Test results
     print("\n6. Testing results calculation...")
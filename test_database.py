@@ -7,15 +7,72 @@ This script tests the database functionality without requiring bot token.
 import sqlite3
 import os
 
+# Room for every statement below, so each call reuses its prepared statement
+SQL_STATEMENT_CACHE_SIZE = 256
+
+# Duplicates leave rowcount at 0 instead of raising IntegrityError
+SQL_INSERT_FILM = "INSERT INTO films (title) VALUES (?) ON CONFLICT (title) DO NOTHING"
+SQL_INSERT_FILM_IF_NEW = "INSERT OR IGNORE INTO films (title) VALUES (?)"
+SQL_GET_ALL_FILMS = "SELECT id, title FROM films ORDER BY title"
+SQL_GET_FILM_ID_BY_TITLE = "SELECT id FROM films WHERE title = ? COLLATE NOCASE"
+# The film's votes go with it via ON DELETE CASCADE
+SQL_DELETE_FILM = "DELETE FROM films WHERE id = ? RETURNING title"
+
+SQL_GET_ACTIVE_ROUND = "SELECT id FROM rounds WHERE is_active = 1"
+
+# The active round is looked up inside the INSERT itself, and a second vote
+# in the same round is skipped rather than raising IntegrityError
+SQL_INSERT_VOTE = (
+    "INSERT INTO votes (user_id, film_id, round_id, seen) "
+    "SELECT ?, ?, id, ? FROM rounds WHERE is_active = 1 LIMIT 1 "
+    "ON CONFLICT (user_id, round_id) DO NOTHING"
+)
+# Only existence matters, so stop at the first match
+SQL_HAS_USER_VOTED = "SELECT 1 FROM votes WHERE user_id = ? AND round_id = ? LIMIT 1"
+# Both counts in one pass; seen is 0/1, so its sum is the number of Seen votes
+SQL_COUNT_FILM_VOTES = "SELECT COALESCE(SUM(seen), 0), COUNT(*) FROM votes WHERE film_id = ? AND round_id = ?"
+
+# Votes are aggregated per film first (a range scan of idx_votes_round_film_seen),
+# then joined once onto the much smaller films table. seen is 0/1, so 2 - seen
+# counts integer half-points (Seen = 1, Unseen = 2), halved once per film as in the bot
+SQL_GET_RESULTS = '''
+    SELECT f.title, COALESCE(s.score, 0) AS total_score
+    FROM films f
+    LEFT JOIN (
+        SELECT film_id, SUM(2 - seen) / 2.0 AS score
+        FROM votes
+        WHERE round_id = ?
+        GROUP BY film_id
+    ) s ON s.film_id = f.id
+    ORDER BY total_score DESC
+'''
+# Same ranking as SQL_GET_RESULTS, but SQLite keeps only the top row
+SQL_GET_WINNER = SQL_GET_RESULTS + "    LIMIT 1\n"
+
 class TestFilmVotingBot:
-    def __init__(self):
-        self.db_name = "test_film_voting.db"
+    def __init__(self, db_name: str = ":memory:"):
+        # In-memory by default, so the test never touches disk; pass a file name to test WAL/fsync behaviour
+        self.db_name = db_name
+        # One connection for the whole test run, closed in cleanup()
+        self.conn = sqlite3.connect(self.db_name, cached_statements=SQL_STATEMENT_CACHE_SIZE)
+        # The harness never changes rounds after init, so the active round is looked up once
+        self._active_round_id = None
+        # Sorted (id, title) rows, dropped whenever a film is added or deleted
+        self._films_cache = None
         self.init_database()
     
     def init_database(self):
         """Initialize the SQLite database with required tables."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
+        
+        # Same connection tuning as the bot; the WAL journal, relaxed fsync and mmap only
+        # take effect when a file name is passed, an in-memory database ignores them
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA foreign_keys=ON")
         
         # Create films table
         cursor.execute('''
@@ -45,178 +102,136 @@ class TestFilmVotingBot:
                 seen BOOLEAN NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(user_id, round_id),
-                FOREIGN KEY (film_id) REFERENCES films (id),
+                FOREIGN KEY (film_id) REFERENCES films (id) ON DELETE CASCADE,
                 FOREIGN KEY (round_id) REFERENCES rounds (id)
             )
         ''')
         
+        # Covering indexes for the per-round results and the per-film counts, plus the
+        # active round and case-insensitive title lookups
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_votes_round_film_seen ON votes(round_id, film_id, seen)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_votes_film_round_seen ON votes(film_id, round_id, seen)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rounds_active ON rounds(is_active) WHERE is_active = 1")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_films_title_nocase ON films(title COLLATE NOCASE)")
+        
         # Create default active round if none exists
         cursor.execute('SELECT COUNT(*) FROM rounds WHERE is_active = 1')
         if cursor.fetchone()[0] == 0:
             cursor.execute('INSERT INTO rounds (name, is_active) VALUES (?, ?)', ('Round 1', 1))
         
-        conn.commit()
-        conn.close()
+        self.conn.commit()
         print("✅ Database initialized successfully")
     
     def add_film(self, title: str) -> bool:
         """Add a film to the database."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO films (title) VALUES (?)", (title,))
-            conn.commit()
-            conn.close()
+            with self.conn:
+                cursor = self.conn.execute(SQL_INSERT_FILM, (title,))
+            if cursor.rowcount != 1:
+                print(f"⚠️  Film '{title}' already exists")
+                return False
+            self._films_cache = None
             return True
-        except sqlite3.IntegrityError:
-            print(f"⚠️  Film '{title}' already exists")
-            return False
         except Exception as e:
             print(f"❌ Error adding film: {e}")
             return False
     
+    def add_films(self, titles) -> int:
+        """Add several films in one transaction, skipping existing titles; returns how many were added."""
+        with self.conn:
+            cursor = self.conn.executemany(
+                SQL_INSERT_FILM_IF_NEW, ((title,) for title in titles)
+            )
+        if cursor.rowcount > 0:
+            self._films_cache = None
+        return cursor.rowcount
+    
     def get_all_films(self):
         """Get all films from the database."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title FROM films ORDER BY title")
-        films = cursor.fetchall()
-        conn.close()
-        return films
+        # A tuple, so every caller can share the cached rows safely
+        if self._films_cache is None:
+            self._films_cache = tuple(self.conn.execute(SQL_GET_ALL_FILMS))
+        return self._films_cache
     
     def get_active_round(self) -> int:
         """Get the currently active round ID."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM rounds WHERE is_active = 1")
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        if self._active_round_id is None:
+            cursor = self.conn.execute(SQL_GET_ACTIVE_ROUND)
+            result = cursor.fetchone()
+            self._active_round_id = result[0] if result else None
+        return self._active_round_id
     
     def has_user_voted_in_round(self, user_id: int, round_id: int) -> bool:
         """Check if user has already voted in the current round."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE user_id = ? AND round_id = ?",
-            (user_id, round_id)
-        )
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count > 0
+        cursor = self.conn.execute(SQL_HAS_USER_VOTED, (user_id, round_id))
+        return cursor.fetchone() is not None
     
     def add_vote(self, user_id: int, film_id: int, seen: bool) -> bool:
         """Add a vote for a film in the current round."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Get active round
-            round_id = self.get_active_round()
-            if not round_id:
-                print("❌ No active round found")
+            with self.conn:
+                cursor = self.conn.execute(SQL_INSERT_VOTE, (user_id, film_id, seen))
+            if cursor.rowcount != 1:
+                if self.get_active_round() is None:
+                    print("❌ No active round found")
+                else:
+                    print(f"⚠️  User {user_id} has already voted in this round")
                 return False
-            
-            cursor.execute(
-                "INSERT INTO votes (user_id, film_id, round_id, seen) VALUES (?, ?, ?, ?)",
-                (user_id, film_id, round_id, seen)
-            )
-            conn.commit()
-            conn.close()
             return True
-        except sqlite3.IntegrityError:
-            print(f"⚠️  User {user_id} has already voted in round {round_id}")
-            return False
         except Exception as e:
             print(f"❌ Error adding vote: {e}")
             return False
     
+    def add_votes(self, votes) -> int:
+        """Add several (user_id, film_id, seen) votes in one transaction; returns how many were recorded."""
+        with self.conn:
+            cursor = self.conn.executemany(SQL_INSERT_VOTE, votes)
+        return cursor.rowcount
+    
     def get_results(self, round_id: int = None):
-        """Get all films with their scores for a specific round, sorted by highest first."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
+        """Yield all films with their scores for a specific round, sorted by highest first."""
         if round_id is None:
             round_id = self.get_active_round()
         
-        cursor.execute('''
-            SELECT f.title, 
-                   COALESCE(SUM(
-                       CASE 
-                           WHEN v.seen = 1 THEN 0.5
-                           WHEN v.seen = 0 THEN 1.0
-                           ELSE 0
-                       END
-                   ), 0) as total_score
-            FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id AND v.round_id = ?
-            GROUP BY f.id, f.title
-            ORDER BY total_score DESC
-        ''', (round_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        # Rows are streamed from the cursor instead of being collected with fetchall()
+        yield from self.conn.execute(SQL_GET_RESULTS, (round_id,))
+    
+    def get_results_list(self, round_id: int = None):
+        """Get all films with their scores for a specific round as a list."""
+        return list(self.get_results(round_id))
     
     def get_winner(self, round_id: int = None):
         """Get the top-scoring film for a specific round."""
-        results = self.get_results(round_id)
-        return results[0] if results else (None, 0.0)
+        if round_id is None:
+            round_id = self.get_active_round()
+        
+        cursor = self.conn.execute(SQL_GET_WINNER, (round_id,))
+        return cursor.fetchone() or (None, 0.0)
     
     def get_vote_counts_for_film(self, film_id: int, round_id: int = None):
         """Get vote counts for a specific film in a round."""
         if round_id is None:
             round_id = self.get_active_round()
         
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Get seen votes
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE film_id = ? AND round_id = ? AND seen = 1",
-            (film_id, round_id)
-        )
-        seen_count = cursor.fetchone()[0]
-        
-        # Get unseen votes
-        cursor.execute(
-            "SELECT COUNT(*) FROM votes WHERE film_id = ? AND round_id = ? AND seen = 0",
-            (film_id, round_id)
-        )
-        unseen_count = cursor.fetchone()[0]
-        
-        conn.close()
+        cursor = self.conn.execute(SQL_COUNT_FILM_VOTES, (film_id, round_id))
+        seen_count, total_count = cursor.fetchone()
         
         return {
             'seen': seen_count,
-            'unseen': unseen_count,
-            'total': seen_count + unseen_count
+            'unseen': total_count - seen_count,
+            'total': total_count
         }
     
     def delete_film(self, film_id: int) -> bool:
         """Delete a film and all its associated votes."""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # First, get the film title for logging
-            cursor.execute("SELECT title FROM films WHERE id = ?", (film_id,))
-            result = cursor.fetchone()
+            with self.conn:
+                result = self.conn.execute(SQL_DELETE_FILM, (film_id,)).fetchone()
             if not result:
-                conn.close()
                 return False
             
+            self._films_cache = None
             film_title = result[0]
-            
-            # Delete all votes for this film
-            cursor.execute("DELETE FROM votes WHERE film_id = ?", (film_id,))
-            
-            # Delete the film
-            cursor.execute("DELETE FROM films WHERE id = ?", (film_id,))
-            
-            conn.commit()
-            conn.close()
-            
             print(f"✅ Film '{film_title}' (ID: {film_id}) deleted successfully")
             return True
         except Exception as e:
@@ -225,16 +240,14 @@ class TestFilmVotingBot:
     
     def get_film_id_by_title(self, title: str) -> int:
         """Get film ID by title (case-insensitive)."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM films WHERE LOWER(title) = LOWER(?)", (title,))
+        cursor = self.conn.execute(SQL_GET_FILM_ID_BY_TITLE, (title,))
         result = cursor.fetchone()
-        conn.close()
         return result[0] if result else None
     
     def cleanup(self):
-        """Remove test database."""
-        if os.path.exists(self.db_name):
+        """Close the connection and remove test database."""
+        self.conn.close()
+        if self.db_name != ":memory:" and os.path.exists(self.db_name):
             os.remove(self.db_name)
             print("🧹 Test database cleaned up")
 
@@ -244,7 +257,7 @@ def test_database():
     print("=" * 50)
     
     # Initialize bot
-    bot = TestFilmVotingBot()
+    bot = TestFilmVotingBot(":memory:")
     
     # Test adding films
     print("\n2. Testing film addition...")
@@ -256,12 +269,12 @@ def test_database():
         "Inception"
     ]
     
-    for film in test_films:
-        success = bot.add_film(film)
-        if success:
-            print(f"✅ Added: {film}")
-        else:
-            print(f"❌ Failed to add: {film}")
+    # One transaction for the whole list
+    added = bot.add_films(test_films)
+    if added == len(test_films):
+        print(f"✅ Added {added} films")
+    else:
+        print(f"❌ Only added {added} of {len(test_films)} films")
     
     # Test duplicate prevention
     print("\n3. Testing duplicate prevention...")
@@ -271,20 +284,24 @@ def test_database():
     else:
         print("❌ Duplicate prevention failed")
     
-    # Test voting
-    print("\n4. Testing voting system...")
+    # Test voting: both users' votes go in one transaction
+    print("\n4. Testing voting system with multiple users...")
     test_user_id = 12345
+    test_user_id_2 = 67890
     films = bot.get_all_films()
     
-    # Test first user voting (should succeed)
-    film_id, title = films[0]
-    success = bot.add_vote(test_user_id, film_id, True)
-    if success:
-        print(f"✅ User 1 voted 'Seen' for: {title}")
+    recorded = bot.add_votes([
+        (test_user_id, films[0][0], True),
+        (test_user_id_2, films[1][0], False),
+    ])
+    if recorded == 2:
+        print(f"✅ User 1 voted 'Seen' for: {films[0][1]}")
+        print(f"✅ User 2 voted 'Not Seen' for: {films[1][1]}")
     else:
-        print(f"❌ Failed to vote 'Seen' for: {title}")
+        print(f"❌ Only recorded {recorded} of 2 votes")
     
     # Test duplicate vote prevention (should fail)
+    print("\n5. Testing duplicate vote prevention...")
     film_id, title = films[1]
     success = bot.add_vote(test_user_id, film_id, False)
     if not success:
@@ -292,16 +309,6 @@ def test_database():
     else:
         print(f"❌ Duplicate vote prevention failed for user 1")
     
-    # Test another user voting
-    print("\n5. Testing multiple users...")
-    test_user_id_2 = 67890
-    film_id, title = films[1]
-    success = bot.add_vote(test_user_id_2, film_id, False)
-    if success:
-        print(f"✅ User 2 voted 'Not Seen' for: {title}")
-    else:
-        print(f"❌ User 2 failed to vote for: {title}")
-    
     # Test results
     print("\n6. Testing results calculation...")
     results = bot.get_results()